@@ -1,141 +1,298 @@
+import argparse
+import os
+import sys
 import pandas as pd
+import polars as pl
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 # --- CONFIGURATION ---
 RESULTS_FILE = "experiment_results_detailed.csv"
+# When set, the plots are saved to this path instead of being shown
+PLOTS_FILE = os.environ.get("EVALUATOR_PLOTS")
+# Where the plots go when the backend cannot show them (e.g. Agg for piped output) and PLOTS_FILE is unset
+DEFAULT_PLOTS_FILE = "evaluator_plots.png"
+# Wording used by the reports and plots for each objective sense ('min' or 'max')
+SENSE_WORDING = {
+    'min': {'better': 'Lower', 'best': 'Lowest', 'worse': 'higher'},
+    'max': {'better': 'Higher', 'best': 'Highest', 'worse': 'lower'},
+}
+# Output formats for which rasterizing the bars actually shrinks the file
+VECTOR_FORMATS = ('.pdf', '.svg', '.eps', '.ps')
+# The only columns the analysis uses, with explicit dtypes so the CSV reader skips type inference
+RESULTS_SCHEMA = {
+    'strategy': pl.Categorical,
+    'alpha': pl.Float64,
+    'op_set': pl.Categorical,
+    'final_obj': pl.Float64,
+    'total_time': pl.Float64,
+    'iterations': pl.Int64,
+    'seed': pl.Int64,
+}
 pd.set_option('display.max_rows', 500)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 
+def cache_path(file_path):
+    """Path of the Parquet sidecar that caches the parsed CSV."""
+    return os.path.splitext(file_path)[0] + ".parquet"
+
+def cache_is_fresh(file_path):
+    """The sidecar can be reused as long as it is readable and not older than the CSV."""
+    parquet_path = cache_path(file_path)
+    if not os.path.isfile(parquet_path) or os.path.getmtime(parquet_path) < os.path.getmtime(file_path):
+        return False
+    try:
+        # Only reads the footer; a truncated or corrupt sidecar is treated as stale
+        pl.read_parquet_schema(parquet_path)
+    except (OSError, pl.exceptions.PolarsError):
+        return False
+    return True
+
+def cache_is_writable(file_path):
+    """Whether the sidecar can be (re)written next to the CSV, e.g. not in a read-only checkout."""
+    parquet_path = cache_path(file_path)
+    return os.access(os.path.dirname(parquet_path) or '.', os.W_OK) and not os.path.isdir(parquet_path)
+
 def load_and_prepare_data(file_path):
-    """Loads the CSV and prepares the op_set for grouping."""
+    """Lazily scans the results (from the Parquet cache when fresh); nothing is parsed until the summaries are collected."""
     print(f"Loading results from {file_path}...")
-    try:
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
+    if not os.path.exists(file_path):
         print(f"Error: File not found at {file_path}")
         return None
-    
-    # Ensure op_set is a string for grouping (it might be saved as a string representation of a tuple)
-    df['op_set_str'] = df['op_set'].astype(str)
-    
-    # Calculate the normalized objective for comparison (lower is better)
-    # If objective values are large, this might help visualization
-    
-    print(f"Data loaded: {len(df)} total runs.")
-    return df
 
-def analyze_quality_and_robustness(df):
+    if cache_is_fresh(file_path):
+        return pl.scan_parquet(cache_path(file_path))
+
+    # op_set is stored as the string representation of a tuple, so it can be grouped on directly.
+    # The grouping keys are read as categoricals so group_by hashes integer codes instead of strings.
+    # Only the analysed columns are materialized (and cached); paths, logs etc. are skipped.
+    return pl.scan_csv(file_path, schema_overrides=RESULTS_SCHEMA, infer_schema=False).select(list(RESULTS_SCHEMA))
+
+def base_query(lf):
+    """Per-configuration sums; the single pass over the raw runs that every summary is built from."""
+    # Polars group_by is unordered and only emits observed groups; the summaries that are
+    # displayed in rank order sort explicitly, everything else skips the ORDER BY
+    return lf.group_by(['strategy', 'alpha', 'op_set']).agg(
+        pl.len().alias('n'),
+        pl.col('final_obj').sum().alias('sum_obj'),
+        # Sum of squares instead of .std(), so the std falls out of the same single pass
+        (pl.col('final_obj') ** 2).sum().alias('sum_sq'),
+        pl.col('total_time').sum().alias('sum_time'),
+        pl.col('iterations').sum().alias('sum_iter'),
+    )
+
+def rollup(base, keys):
+    """Re-aggregates the per-configuration sums to coarser keys (touches only a handful of rows)."""
+    return base.group_by(keys).agg(pl.col('n', 'sum_obj', 'sum_sq', 'sum_time', 'sum_iter').sum())
+
+def finalize(sums, sense='min'):
+    """Turns group sums into the derived metrics, all evaluated in one with_columns context."""
+    mean_obj = pl.col('sum_obj') / pl.col('n')
+    mean_time = pl.col('sum_time') / pl.col('n')
+    # Sample variance (ddof=1) from the sums, clipped at 0 against rounding error
+    var_obj = ((pl.col('sum_sq') - pl.col('sum_obj') * mean_obj) / (pl.col('n') - 1)).clip(lower_bound=0)
+    return sums.with_columns(
+        mean_obj.alias('mean_obj'),
+        var_obj.sqrt().alias('std_obj'),
+        mean_time.alias('mean_time'),
+        (pl.col('sum_iter') / pl.col('n')).alias('mean_iterations'),
+        # Simple performance metric: Obj * Time when minimizing (Lower is Better),
+        # Obj / Time when maximizing (Higher is Better)
+        (mean_obj * mean_time if sense == 'min' else mean_obj / mean_time).alias('performance_metric'),
+    )
+
+def quality_query(base, sense='min'):
+    """Lazy per-configuration summary used by Step 1, ranked best first."""
+    return finalize(base, sense).select(
+        'strategy', 'alpha', 'op_set', 'mean_obj', 'std_obj', 'mean_time',
+        pl.col('n').alias('num_runs'),
+        # Coefficient of Variation (CV) as a normalized measure of robustness;
+        # it is undefined (null) for a (near) zero mean rather than inf
+        pl.when(pl.col('mean_obj').abs() > 1e-12)
+          .then(pl.col('std_obj') / pl.col('mean_obj').abs() * 100)
+          .otherwise(None)
+          .alias('CV_obj'),
+    ).sort(
+        # group_by output is unordered, so break exact ties on the (lexical) configuration keys
+        ['mean_obj', pl.col('strategy').cast(pl.String), 'alpha', pl.col('op_set').cast(pl.String)],
+        descending=[sense == 'max', False, False, False],
+    )
+
+def efficiency_query(base, sense='min'):
+    """Lazy per-strategy summary used by Step 2."""
+    # Group only by strategy, as this is the primary driver of efficiency
+    return finalize(rollup(base, 'strategy'), sense).select(
+        'strategy', 'mean_obj', 'mean_time', 'mean_iterations', 'performance_metric'
+    )
+
+def op_set_query(base):
+    """Lazy per-operator-set summary used by Step 2."""
+    return finalize(rollup(base, 'op_set')).select('op_set', 'mean_obj', 'mean_time').sort('mean_time')
+
+def visualization_query(base):
+    """Lazy (strategy, alpha) summary used by Step 3."""
+    # No sort needed: seaborn orders the alpha axis and the strategy hue itself
+    return finalize(rollup(base, ['strategy', 'alpha'])).select('strategy', 'alpha', 'mean_obj', 'mean_time')
+
+def print_summary(summary):
+    """Prints a summary with 2 decimals; formatting happens while rendering, no rounded copy is made."""
+    with pd.option_context('display.float_format', '{:.2f}'.format):
+        print(summary)
+
+def analyze_quality_and_robustness(quality_summary, sense='min'):
     """Step 1: Analyze Quality (Mean Final Obj) and Robustness (Std Dev)."""
     print("\n" + "="*80)
     print("🏆 Step 1: Quality (Mean Objective) and Robustness (Std Dev)")
     print("="*80)
     
-    # Group by the main configuration parameters
-    quality_summary = df.groupby(['strategy', 'alpha', 'op_set_str']).agg(
-        mean_obj=('final_obj', 'mean'),
-        std_obj=('final_obj', 'std'),
-        mean_time=('total_time', 'mean'),
-        num_runs=('seed', 'count')
-    ).sort_values(by='mean_obj', ascending=True)
-    
-    # Calculate the Coefficient of Variation (CV) as a normalized measure of robustness
-    quality_summary['CV_obj'] = (quality_summary['std_obj'] / quality_summary['mean_obj']) * 100
-    
-    print("\n--- Summary Ranked by Mean Final Objective (Lowest is Best) ---")
-    print(quality_summary.head(15).round(2))
+    print(f"\n--- Summary Ranked by Mean Final Objective ({SENSE_WORDING[sense]['best']} is Best) ---")
+    print_summary(quality_summary.head(15))
     
     print("\n--- Interpretation ---")
     best_config = quality_summary.index[0]
+    best = quality_summary.iloc[0].to_dict()
     print(f"The best performing configuration on average is: **{best_config}**.")
-    print(f"It achieved a mean objective of **{quality_summary.iloc[0]['mean_obj']:.2f}** and a robustness (CV) of **{quality_summary.iloc[0]['CV_obj']:.2f}%**.")
+    print(f"It achieved a mean objective of **{best['mean_obj']:.2f}** and a robustness (CV) of **{best['CV_obj']:.2f}%**.")
     
     return quality_summary
 
-def analyze_efficiency_and_tradeoff(df):
+def analyze_efficiency_and_tradeoff(efficiency_summary, op_summary, sense='min'):
     """Step 2: Analyze Efficiency (Time) and Quality/Time Trade-off."""
     print("\n" + "="*80)
     print("⚡ Step 2: Efficiency (Time) and Quality/Time Trade-off")
     print("="*80)
     
-    # Group only by strategy, as this is the primary driver of efficiency
-    efficiency_summary = df.groupby('strategy').agg(
-        mean_obj=('final_obj', 'mean'),
-        mean_time=('total_time', 'mean'),
-        mean_iterations=('iterations', 'mean')
-    )
-    
-    # Calculate a simple performance metric: Obj * Time (Lower is Better)
-    efficiency_summary['performance_metric'] = efficiency_summary['mean_obj'] * efficiency_summary['mean_time']
-    
     print("\n--- Strategy Efficiency Summary ---")
-    print(efficiency_summary.round(2))
+    print_summary(efficiency_summary)
 
     print("\n--- Operator Set Efficiency ---")
-    op_summary = df.groupby('op_set_str').agg(
-        mean_obj=('final_obj', 'mean'),
-        mean_time=('total_time', 'mean'),
-    ).sort_values(by='mean_time', ascending=True)
-    print(op_summary.round(2))
+    print_summary(op_summary)
     
     print("\n--- Interpretation ---")
     if efficiency_summary.loc['first', 'mean_time'] < efficiency_summary.loc['best', 'mean_time']:
         quality_diff = ((efficiency_summary.loc['first', 'mean_obj'] / efficiency_summary.loc['best', 'mean_obj']) - 1) * 100
+        if sense == 'max':
+            quality_diff = -quality_diff
         time_ratio = efficiency_summary.loc['best', 'mean_time'] / efficiency_summary.loc['first', 'mean_time']
         
         print(f"The **'first'** strategy is **{time_ratio:.1f} times faster** on average than 'best'.")
-        print(f"It sacrifices **{quality_diff:.2f}%** in solution quality (i.e., higher objective value).")
+        print(f"It sacrifices **{quality_diff:.2f}%** in solution quality (i.e., {SENSE_WORDING[sense]['worse']} objective value).")
         print("Decide if the speed gain is worth the small loss in quality.")
 
 
-def visualize_results(df):
+def visualize_results(df_agg, sense='min'):
     """Step 3: Visualize key comparisons for intuitive understanding."""
     print("\n" + "="*80)
     print("📈 Step 3: Visualization")
     print("="*80)
-    
-    df_agg = df.groupby(['strategy', 'alpha']).agg(
-        mean_obj=('final_obj', 'mean'),
-        mean_time=('total_time', 'mean'),
-    ).reset_index()
 
+    # Plotting libraries are imported here so runs without plots skip their start-up cost
+    import matplotlib
+    if not sys.stdout.isatty() and 'MPLBACKEND' not in os.environ:
+        # Batch runs never show a window, so skip the interactive (Qt/Tk) backend start-up
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # df_agg already holds one row per bar, so seaborn has nothing left to estimate or bootstrap
     plt.figure(figsize=(14, 6))
 
     # Plot 1: Mean Objective vs. Alpha by Strategy
     plt.subplot(1, 2, 1)
-    sns.barplot(data=df_agg, x='alpha', y='mean_obj', hue='strategy', palette='viridis')
+    sns.barplot(data=df_agg, x='alpha', y='mean_obj', hue='strategy', errorbar=None, palette='viridis')
     plt.title('Mean Final Objective by Alpha and Strategy (Quality)', fontsize=14)
     plt.xlabel('Alpha Parameter', fontsize=12)
-    plt.ylabel('Mean Objective Value (Lower is Better)', fontsize=12)
+    plt.ylabel(f"Mean Objective Value ({SENSE_WORDING[sense]['better']} is Better)", fontsize=12)
     plt.grid(axis='y', linestyle='--', alpha=0.7)
     
     # Plot 2: Mean Time vs. Alpha by Strategy
     plt.subplot(1, 2, 2)
-    sns.barplot(data=df_agg, x='alpha', y='mean_time', hue='strategy', palette='plasma')
+    sns.barplot(data=df_agg, x='alpha', y='mean_time', hue='strategy', errorbar=None, palette='plasma')
     plt.title('Mean Total Time by Alpha and Strategy (Efficiency)', fontsize=14)
     plt.xlabel('Alpha Parameter', fontsize=12)
     plt.ylabel('Mean Total Time (Seconds)', fontsize=12)
     plt.grid(axis='y', linestyle='--', alpha=0.7)
 
     plt.tight_layout()
-    plt.show()
-    print("Visualization plots generated.")
+    plots_file = PLOTS_FILE
+    if not plots_file and matplotlib.get_backend().lower() == 'agg':
+        # Agg cannot show a window, so save the figure rather than silently dropping it
+        plots_file = DEFAULT_PLOTS_FILE
+    if plots_file:
+        if os.path.splitext(plots_file)[1].lower() in VECTOR_FORMATS:
+            for ax in plt.gcf().axes:
+                for bar in ax.patches:
+                    bar.set_rasterized(True)
+        plt.savefig(plots_file, dpi=120)
+        plt.close()
+        print(f"Visualization plots saved to {plots_file}.")
+    else:
+        plt.show()
+        print("Visualization plots generated.")
     
-def main_analysis():
-    df = load_and_prepare_data(RESULTS_FILE)
-    if df is None:
+def main_analysis(sense='min', plot=True):
+    """Runs the full analysis; sense is 'min' when a lower final_obj is better, 'max' when a higher one is."""
+    if sense not in SENSE_WORDING:
+        raise ValueError(f"sense must be one of {list(SENSE_WORDING)}, got {sense!r}")
+    lf = load_and_prepare_data(RESULTS_FILE)
+    if lf is None:
         return
+    refresh_cache = not cache_is_fresh(RESULTS_FILE)
+
+    # Every summary is derived from the same fine-grained group_by; a single collect_all
+    # lets the optimizer compute that shared subplan (and the scan) only once. The streaming
+    # engine pushes the runs through the group_by in chunks, so the raw results never need to fit in RAM.
+    base = base_query(lf)
+    summaries = [
+        base.select(pl.col('n').sum()),
+        quality_query(base, sense),
+        efficiency_query(base, sense),
+        op_set_query(base),
+        visualization_query(base),
+    ]
+    parquet_path = cache_path(RESULTS_FILE)
+    write_cache = refresh_cache and cache_is_writable(RESULTS_FILE)
+    if refresh_cache and not write_cache:
+        # Failing to cache (e.g. a read-only checkout) is not fatal
+        print(f"Warning: cannot write the results cache to {parquet_path}; continuing without it.")
+    if write_cache:
+        # A stale Parquet cache is rewritten as part of the same plan, so the CSV is still parsed once.
+        # It is written to a temp file and moved into place, so an interrupted run never leaves a
+        # truncated cache behind. Errors from the plan itself (bad data) propagate as usual.
+        tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+        try:
+            *results, _ = pl.collect_all(
+                summaries + [lf.sink_parquet(tmp_path, compression='zstd', lazy=True)], engine='streaming'
+            )
+            try:
+                os.replace(tmp_path, parquet_path)
+                print(f"Cached results to {parquet_path}.")
+            except OSError as e:
+                print(f"Warning: could not cache results to {parquet_path} ({e}); continuing without the cache.")
+        finally:
+            # Also runs on errors and Ctrl-C, so no partial temp file is left next to the CSV
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    else:
+        results = pl.collect_all(summaries, engine='streaming')
+    n_runs, quality_summary, efficiency_summary, op_summary, df_agg = results
+    print(f"Data loaded: {n_runs.item()} total runs.")
+
+    # The summaries are small, so pandas is kept for display and plotting
+    quality_summary = quality_summary.to_pandas().set_index(['strategy', 'alpha', 'op_set'])
+    efficiency_summary = efficiency_summary.to_pandas().set_index('strategy')
+    op_summary = op_summary.to_pandas().set_index('op_set')
+    df_agg = df_agg.to_pandas()
 
     # 1. Quality and Robustness
-    analyze_quality_and_robustness(df)
+    analyze_quality_and_robustness(quality_summary, sense)
     
     # 2. Efficiency and Trade-off
-    analyze_efficiency_and_tradeoff(df)
+    analyze_efficiency_and_tradeoff(efficiency_summary, op_summary, sense)
     
     # 3. Visualization
-    visualize_results(df)
+    if plot:
+        visualize_results(df_agg, sense)
     
     print("\n" + "="*80)
     print("✅ Analysis Complete.")
@@ -144,4 +301,10 @@ def main_analysis():
     print("="*80)
 
 if __name__ == "__main__":
-    main_analysis()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Summarize the local search experiment results.")
+    parser.add_argument('--sense', choices=list(SENSE_WORDING), default='min',
+                        help="whether a lower ('min') or higher ('max') final_obj is better")
+    parser.add_argument('--no-plot', dest='plot', action='store_false',
+                        help="skip Step 3 (and the matplotlib/seaborn imports)")
+    args = parser.parse_args()
+    main_analysis(args.sense, args.plot)
\ No newline at end of file